@@ -1,7 +1,11 @@
 """This module will expand later."""
-import inspect
+import functools
+import itertools
+import linecache
+import os
 import sys
 import warnings
+from collections import OrderedDict
 from importlib import import_module
 from typing import List, Type
 
@@ -17,7 +21,20 @@ from .path_info import path_utils
 from .typing_info import _E, CauseInfo, Parser
 
 _ = current_lang.translate
-_warnings_seen = {}
+# Long-running sessions can issue many distinct warnings; we only remember
+# the most recent ones so that this record does not grow without limit.
+MAX_WARNINGS_SEEN = 4096
+_warnings_seen = OrderedDict()
+_source_formatters = {}
+_SOURCE_OPTIONS = Options(blank_lines=BlankLines.SINGLE, before=2)
+
+# friendly_idle causes these two warnings.
+_IGNORED_IMPORT_WARNINGS = frozenset(
+    {
+        "PatchingFinder.find_spec() not found; falling back to find_module()",
+        "PatchingLoader.exec_module() not found; falling back to load_module()",
+    }
+)
 
 _run_with_pytest = False
 if "pytest" in sys.modules:
@@ -31,10 +48,17 @@ class MyFormatter(Formatter):
 
 class WarningInfo:
     def __init__(
-        self, warning_instance, warning_type, filename, lineno, frame=None, lines=None
+        self,
+        warning_instance,
+        warning_type,
+        filename,
+        lineno,
+        frame=None,
+        lines=None,
+        message=None,
     ):
         self.warning_instance = warning_instance
-        self.message = str(warning_instance)
+        self.message = str(warning_instance) if message is None else message
         self.warning_type = warning_type
         self.filename = filename
         self.lineno = lineno
@@ -62,7 +86,7 @@ class WarningInfo:
     def recompile_info(self):
         self.info["lang"] = session.lang
         self.info["generic"] = get_generic_explanation(self.warning_type)
-        short_filename = path_utils.shorten_path(self.filename)
+        short_filename = shorten_path(self.filename)
         if "[" in short_filename:
             location = _(
                 "Warning issued on line `{line}` of code block {filename}."
@@ -76,25 +100,17 @@ class WarningInfo:
         self.info.update(**get_warning_cause(self.warning_type, self.message, self))
 
     def format_source(self):
-        nb_digits = len(str(self.lineno))
-        lineno_fmt_string = "{:%d}| " % nb_digits  # noqa
-        line_gap_string = " " * nb_digits + "(...)"
-        line_number_gap_string = " " * (nb_digits - 1) + ":"
-
-        formatter = FriendlyFormatter(
-            options=Options(blank_lines=BlankLines.SINGLE, before=2),
-            line_number_format_string=lineno_fmt_string,
-            line_gap_string=line_gap_string,
-            line_number_gap_string=line_number_gap_string,
-        )
+        formatter = get_source_formatter(len(str(self.lineno)))
         formatted = formatter.format_frame(self.frame)
-        return "".join(list(formatted)[1:])
+        return "".join(itertools.islice(formatted, 1, None))
 
     def get_source_frame_missing(self):
         new_lines = []
         try:
             source = executing.Source.for_filename(self.filename)
-            statement = source.statements_at_line(self.lineno).pop()
+            # statements_at_line() returns a set cached by executing; it must not
+            # be modified, so we do not use pop() to retrieve the statement.
+            statement = next(iter(source.statements_at_line(self.lineno)))
             lines = source.lines[statement.lineno - 1 : statement.end_lineno]
             for number, line in enumerate(lines, start=statement.lineno):
                 if number == self.lineno:
@@ -117,28 +133,48 @@ class WarningInfo:
             return formatted_source
 
 
+def get_source_formatter(nb_digits):
+    """Returns a formatter for the source of a warning; only the width
+    used for line numbers differs from one warning to another.
+    """
+    if nb_digits not in _source_formatters:
+        _source_formatters[nb_digits] = FriendlyFormatter(
+            options=_SOURCE_OPTIONS,
+            line_number_format_string=f"{{:{nb_digits}}}| ",
+            line_gap_string=" " * nb_digits + "(...)",
+            line_number_gap_string=" " * (nb_digits - 1) + ":",
+        )
+    return _source_formatters[nb_digits]
+
+
+def shorten_path(filename):
+    """Returns the shortened version of a filename, caching the result
+    since warnings are often issued repeatedly from the same files.
+    """
+    # Relative paths depend on the current directory, and the shortened
+    # names of Jupyter cells depend on the session state; console inputs,
+    # like <pyshell#3>, are not absolute paths either.
+    if not os.path.isabs(filename) or "ipykernel" in filename:
+        return path_utils.shorten_path(filename)
+    return _shorten_absolute_path(filename)
+
+
+@functools.lru_cache(maxsize=1024)
+def _shorten_absolute_path(filename):
+    return path_utils.shorten_path(filename)
+
+
 def saw_warning_before(warning_type, message, filename, lineno):
-    """Records a warning if it has not been seen at the exact location
-    and returns True; returns False otherwise.
+    """Returns True if a warning has already been seen at the exact location;
+    otherwise, records it and returns False.
     """
-    # Note: unlike show_warning whose API is dictated by Python,
-    # we order the argument in some grouping that seems more logical
-    # for the recorded structure
-    if warning_type in _warnings_seen:
-        if message in _warnings_seen[warning_type]:
-            if filename in _warnings_seen[warning_type][message]:
-                if lineno in _warnings_seen[warning_type][message][filename]:
-                    return True
-                _warnings_seen[warning_type][message][filename].append(lineno)
-            else:
-                _warnings_seen[warning_type][message][filename] = [lineno]
-        else:
-            _warnings_seen[warning_type][message] = {}
-            _warnings_seen[warning_type][message][filename] = [lineno]
-    else:
-        _warnings_seen[warning_type] = {}
-        _warnings_seen[warning_type][message] = {}
-        _warnings_seen[warning_type][message][filename] = [lineno]
+    key = (warning_type, message, filename, lineno)
+    if key in _warnings_seen:
+        _warnings_seen.move_to_end(key)
+        return True
+    _warnings_seen[key] = None
+    if len(_warnings_seen) > MAX_WARNINGS_SEEN:
+        _warnings_seen.popitem(last=False)
     return False
 
 
@@ -147,53 +183,65 @@ def show_warning(
 ):
     if filename == "<>":  # internal to IPython
         return
-    if (  # friendly_idle causes these two warnings.
-        warning_type == ImportWarning
-        and str(warning_instance)
-        in [
-            "PatchingFinder.find_spec() not found; falling back to find_module()",
-            "PatchingLoader.exec_module() not found; falling back to load_module()",
-        ]
-    ):
+    message = str(warning_instance)
+    if warning_type is ImportWarning and message in _IGNORED_IMPORT_WARNINGS:
         return
-    if saw_warning_before(
-        warning_type.__name__, str(warning_instance), filename, lineno
-    ):
+    if saw_warning_before(warning_type.__name__, message, filename, lineno):
         # Avoid showing the same warning if it occurs in a loop, or in
         # other way in which a given instruction that give rise to a warning
         # is repeated
         return
 
+    if _run_with_pytest:
+        # Warnings are not recorded while running tests; we only need to know
+        # if the parsers included in friendly-traceback can explain them.
+        if "cause" in get_warning_cause(warning_type, message, None, core_only=True):
+            # We know how to explain this; we do not print while running tests
+            return
+        session.write_err(f"`{warning_type.__name__}`: {message}\n")
+        return
+
     try:
-        for outer_frame in inspect.getouterframes(inspect.currentframe()):
-            if outer_frame.filename == filename and outer_frame.lineno == lineno:
+        # Walking the stack by hand is much cheaper than using
+        # inspect.getouterframes(), which looks up the source of every frame.
+        frame = sys._getframe(1)
+        while frame is not None:
+            if frame.f_code.co_filename == filename and frame.f_lineno == lineno:
                 warning_data = WarningInfo(
                     warning_instance,
                     warning_type,
                     filename,
                     lineno,
-                    frame=outer_frame.frame,
-                    lines=outer_frame.code_context,
+                    frame=frame,
+                    lines=linecache.getlines(filename)[lineno - 1 : lineno],
+                    message=message,
                 )
                 break
+            frame = frame.f_back
         else:
-            warning_data = WarningInfo(warning_instance, warning_type, filename, lineno)
+            warning_data = WarningInfo(
+                warning_instance, warning_type, filename, lineno, message=message
+            )
     except Exception:
-        warning_data = WarningInfo(warning_instance, warning_type, filename, lineno)
-
-    message = str(warning_instance)
+        warning_data = WarningInfo(
+            warning_instance, warning_type, filename, lineno, message=message
+        )
 
-    if not _run_with_pytest:
-        session.recorded_tracebacks.append(warning_data)
-    elif "cause" in warning_data.info:
-        # We know how to explain this; we do not print while running tests
-        return
+    session.recorded_tracebacks.append(warning_data)
     session.write_err(f"`{warning_type.__name__}`: {message}\n")
 
 
 def enable_warnings():
+    # We do not use "default": Python's registry of warnings seen ignores
+    # the filename, and would hide the same warning issued from different
+    # console inputs sharing the same globals. saw_warning_before takes
+    # care of repeated warnings instead.
     warnings.simplefilter("always")
     warnings.showwarning = show_warning
+    # Import the known parsers now rather than when the first warning
+    # of a given type is issued, possibly deep inside some user's code.
+    for warning_type in INCLUDED_PARSERS:
+        get_warning_parser(warning_type)
 
 
 INCLUDED_PARSERS = {
@@ -224,11 +272,15 @@ class WarningDataParser:
         to a list that is automatically updated.
 
             @instance.add
-            def some_warning_parsers(message, traceback_data):
+            def some_warning_parsers(message, warning_data):
                 ....
+
+        Custom parsers are not used when running tests with pytest,
+        where no warning data is gathered.
         """
+        # Custom parsers are tried first, in the order they were added.
+        self.parsers.insert(len(self.custom_parsers), func)
         self.custom_parsers.append(func)
-        self.parsers = self.custom_parsers + self.core_parsers
 
 
 def get_warning_parser(warning_type: Type[_E]) -> WarningDataParser:
@@ -244,10 +296,11 @@ def get_warning_cause(
     warning_type,
     message: str,
     warning_data: WarningDataParser = None,
+    core_only: bool = False,
 ) -> CauseInfo:
     """Attempts to get the likely cause of an exception."""
     try:
-        return get_cause(warning_type, message, warning_data)
+        return get_cause(warning_type, message, warning_data, core_only)
     except Exception as e:  # noqa # pragma: no cover
         session.write_err("Exception raised")
         session.write_err(str(e))
@@ -259,12 +312,18 @@ def get_cause(
     warning_type,
     message: str,
     warning_data: WarningDataParser = None,
+    core_only: bool = False,
 ) -> CauseInfo:
     """For a given exception type, cycle through the known message parsers,
-    looking for one that can find a cause of the exception."""
+    looking for one that can find a cause of the exception.
+    If core_only is True, custom parsers are ignored."""
     warning_parsers = get_warning_parser(warning_type)
+    if core_only:
+        parsers = warning_parsers.core_parsers
+    else:
+        parsers = warning_parsers.parsers
 
-    for parser in warning_parsers.parsers:
+    for parser in parsers:
         # This could be simpler if we could use the walrus operator
         cause = parser(message, warning_data)
         if cause:
@@ -5,6 +5,7 @@ can be useful for beginners without overwhelming them.
 """
 import ast
 import builtins
+import functools
 import re
 import sys
 import types
@@ -274,27 +275,29 @@ def get_var_info(line: str, frame: types.FrameType) -> dict:
     """
 
     names_info = []
-    objects = get_all_objects(line.strip(), frame)
+    line = line.strip()
+    if includes_names(line):
+        objects = get_all_objects(line, frame)
 
-    objects["locals"].sort()
-    for name, obj in objects["locals"]:
-        result = format_var_info(name, obj)
-        names_info.append(result)
+        objects["locals"].sort()
+        for name, obj in objects["locals"]:
+            result = format_var_info(name, obj)
+            names_info.append(result)
 
-    objects["globals"].sort()
-    for name, obj in objects["globals"]:
-        result = format_var_info(name, obj, "globals")
-        names_info.append(result)
+        objects["globals"].sort()
+        for name, obj in objects["globals"]:
+            result = format_var_info(name, obj, "globals")
+            names_info.append(result)
 
-    objects["builtins"].sort()
-    for name, obj in objects["builtins"]:
-        result = format_var_info(name, obj)
-        names_info.append(result)
+        objects["builtins"].sort()
+        for name, obj in objects["builtins"]:
+            result = format_var_info(name, obj)
+            names_info.append(result)
 
-    objects["expressions"].sort()
-    for name, obj in objects["expressions"]:
-        result = format_var_info(name, obj)
-        names_info.append(result)
+        objects["expressions"].sort()
+        for name, obj in objects["expressions"]:
+            result = format_var_info(name, obj)
+            names_info.append(result)
 
     if names_info:
         names_info.append("")
@@ -305,6 +308,15 @@ def get_var_info(line: str, frame: types.FrameType) -> dict:
     return var_info
 
 
+@functools.lru_cache(maxsize=512)
+def includes_names(line: str) -> bool:
+    """Returns True if a line of code includes some identifiers, and thus
+    possibly some variables whose values can be shown.
+    """
+    tokens = token_utils.get_significant_tokens(line)
+    return any(token.is_identifier() for token in tokens)
+
+
 def find_renamed_builtins(frame) -> str:
     warnings = ""
     for name in dir(builtins):
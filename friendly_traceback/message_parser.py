@@ -1,5 +1,5 @@
 from importlib import import_module
-from typing import List, Type
+from typing import Callable, Dict, Iterator, List, Type
 
 from . import debug_helper
 from .ft_gettext import internal_error, no_information, unknown_case
@@ -31,6 +31,8 @@ class RuntimeMessageParser:
         self.parsers: List[Parser] = []
         self.core_parsers: List[Parser] = []
         self.custom_parsers: List[Parser] = []
+        # Substrings which must be found in a message for a given parser to apply
+        self.required_substrings: Dict[Parser, str] = {}
 
     def _add(self, func: Parser) -> None:
         """This method is meant to be used only within friendly-traceback.
@@ -40,6 +42,19 @@ class RuntimeMessageParser:
         self.parsers.append(func)
         self.core_parsers.append(func)
 
+    def _add_matching(self, substring: str) -> Callable[[Parser], None]:
+        """This method is meant to be used only within friendly-traceback.
+        It is used as a decorator, like _add, for message parsers that
+        only apply to messages which include a given substring; this avoids
+        calling them with messages that they could not possibly analyze.
+        """
+
+        def add_parser(func: Parser) -> None:
+            self.required_substrings[func] = substring
+            self._add(func)
+
+        return add_parser
+
     def add(self, func: Parser) -> None:
         """This method is meant to be used by projects that extend
         friendly-traceback. It is used as a decorator to add a message parser
@@ -52,6 +67,13 @@ class RuntimeMessageParser:
         self.custom_parsers.append(func)
         self.parsers = self.custom_parsers + self.core_parsers
 
+    def get_candidates(self, message: str) -> Iterator[Parser]:
+        """Yields the parsers which might be able to analyze a message."""
+        for parser in self.parsers:
+            substring = self.required_substrings.get(parser)
+            if substring is None or substring in message:
+                yield parser
+
 
 def get_parser(exception_type: Type[_E]) -> RuntimeMessageParser:
     if exception_type not in RUNTIME_MESSAGE_PARSERS:
@@ -84,7 +106,7 @@ def get_cause(
     looking for one that can find a cause of the exception."""
     message_parser = get_parser(exception_type)
 
-    for parser in message_parser.parsers:
+    for parser in message_parser.get_candidates(message):
         # This could be simpler if we could use the walrus operator
         cause = parser(message, tb_data)
         if cause:
@@ -1,24 +1,20 @@
 import ast
-from types import FrameType
 from typing import Any, Optional, Tuple
 
-from .. import info_variables, utils
+from .. import utils
 from ..ft_gettext import current_lang, please_report
 from ..message_parser import get_parser
 from ..tb_data import TracebackData  # for type checking only
-from ..typing_info import CauseInfo  # for type checking only
+from ..typing_info import CauseInfo, ObjectsInfo  # for type checking only
 
 parser = get_parser(KeyError)
 _ = current_lang.translate
 
 
-@parser._add
-def popitem_from_empty_dict(message: str, tb_data: TracebackData) -> CauseInfo:
-    if "popitem(): dictionary is empty" not in message:
-        return {}
-
-    frame = tb_data.exception_frame
-    name, _obj = find_empty_dict_like_obj(frame, tb_data.bad_line)
+@parser._add_matching("popitem(): dictionary is empty")
+def popitem_from_empty_dict(_message: str, tb_data: TracebackData) -> CauseInfo:
+    all_objects = tb_data.get_all_objects(tb_data.bad_line, tb_data.exception_frame)
+    name, _obj = find_empty_dict_like_obj(all_objects)
     if name is None:  # pragma: no cover
         cause = _(
             "You tried to retrieve an item from an empty `dict`\n"
@@ -33,18 +29,16 @@ def popitem_from_empty_dict(message: str, tb_data: TracebackData) -> CauseInfo:
     return {"cause": cause, "suggest": hint}
 
 
-@parser._add
-def popitem_from_empty_chain_map(message: str, tb_data: TracebackData) -> CauseInfo:
-    if "No keys found in the first mapping." not in message:
-        return {}
-
+@parser._add_matching("No keys found in the first mapping.")
+def popitem_from_empty_chain_map(_message: str, tb_data: TracebackData) -> CauseInfo:
     # The exception is not raised in the user's code, but inside the
     # collection module. Unlike essentially all the other cases,
     # we search the information from the frame calling frame, and not
     # the one where the exception was raised.
-    name, _obj = find_empty_dict_like_obj(
-        tb_data.program_stopped_frame, tb_data.program_stopped_bad_line
+    all_objects = tb_data.get_all_objects(
+        tb_data.program_stopped_bad_line, tb_data.program_stopped_frame
     )
+    name, _obj = find_empty_dict_like_obj(all_objects)
     if name is None:  # pragma: no cover
         cause = _(
             "You tried to retrieve an item from an empty ChainMap\n"
@@ -59,16 +53,13 @@ def popitem_from_empty_chain_map(message: str, tb_data: TracebackData) -> CauseI
     return {"cause": cause, "suggest": hint}
 
 
-@parser._add
-def missing_key_in_chain_map(message: str, tb_data: TracebackData) -> CauseInfo:
+@parser._add_matching("Key not found in the first mapping: ")
+def missing_key_in_chain_map(_message: str, tb_data: TracebackData) -> CauseInfo:
     """Missing keys in collections.ChainMap from using pop()
     can trigger a secondary exception with a different message.
     It turns out that this is this second message we capture
     while the correct "bad_line" is identified correctly.
     """
-    if "Key not found in the first mapping: " not in message:
-        return {}
-
     frame = tb_data.exception_frame
     value = tb_data.value
     key = value.args[0]
@@ -89,7 +80,8 @@ def missing_key_in_chain_map(message: str, tb_data: TracebackData) -> CauseInfo:
         frame = tb_data.program_stopped_frame
 
     if str(key) in bad_line:
-        cause = analyze_missing_key(key, frame, bad_line)
+        all_objects = tb_data.get_all_objects(bad_line, frame)
+        cause = analyze_missing_key(key, all_objects)
         if cause:
             return cause
 
@@ -111,7 +103,7 @@ def missing_key_in_dict(_message: str, tb_data: TracebackData) -> CauseInfo:
     if str(key) not in bad_line:
         return {}
 
-    return analyze_missing_key(key, frame, bad_line)
+    return analyze_missing_key(key, tb_data.get_all_objects(bad_line, frame))
 
 
 @parser._add
@@ -127,11 +119,11 @@ def missing_key_in_dict_like(_message: str, tb_data: TracebackData) -> CauseInfo
         return {}
     frame = tb_data.program_stopped_frame
 
-    return analyze_missing_key(key, frame, bad_line)
+    return analyze_missing_key(key, tb_data.get_all_objects(bad_line, frame))
 
 
-def analyze_missing_key(key: Any, frame: FrameType, bad_line: str) -> CauseInfo:
-    name, obj = find_missing_key_obj(key, frame, bad_line)
+def analyze_missing_key(key: Any, all_objects: ObjectsInfo) -> CauseInfo:
+    name, obj = find_missing_key_obj(key, all_objects)
     try:
         key_repr = repr(key)
     except Exception:  # noqa
@@ -154,11 +146,11 @@ def analyze_missing_key(key: Any, frame: FrameType, bad_line: str) -> CauseInfo:
         ).format(key=key_repr, name=name, obj_type=obj_type)
 
     if isinstance(key, str):
-        result = key_is_a_string(key, name, obj)
+        result = key_is_a_string(key, key_repr, name, obj)
         if result:
             result["cause"] = begin_cause + result["cause"]
             return result
-    elif str(key) in obj.keys():
+    elif str(key) in obj:
         additional = _(
             "`{name}` contains a string key which is identical to `str({key})`.\n"
             "Perhaps you forgot to convert the key into a string.\n"
@@ -169,25 +161,30 @@ def analyze_missing_key(key: Any, frame: FrameType, bad_line: str) -> CauseInfo:
     return {"cause": begin_cause}
 
 
-def key_is_a_string(key: str, dict_name: str, obj: Any) -> CauseInfo:
-    keys = [str(k) for k in obj.keys()]
-    if key in keys:
-        additional = _(
-            "`{key}` is a string.\n"
-            "There is a key of `{name}` whose string representation\n"
-            "is identical to `{key}`.\n"
-        ).format(key=repr(key), name=dict_name)
-        hint = _("Did you convert `{key}` into a string by mistake?\n").format(key=key)
-        return {"cause": additional, "suggest": hint}
+def key_is_a_string(key: str, key_repr: str, dict_name: str, obj: Any) -> CauseInfo:
+    # A single pass over the keys, as obj can be a very large dict.
+    string_keys = []
+    for k in obj.keys():
+        if str(k) == key:
+            additional = _(
+                "`{key}` is a string.\n"
+                "There is a key of `{name}` whose string representation\n"
+                "is identical to `{key}`.\n"
+            ).format(key=key_repr, name=dict_name)
+            hint = _("Did you convert `{key}` into a string by mistake?\n").format(
+                key=key
+            )
+            return {"cause": additional, "suggest": hint}
+        if isinstance(k, str):
+            string_keys.append(k)
 
-    string_keys = [k for k in obj.keys() if isinstance(k, str)]
     similar = utils.get_similar_words(key, string_keys)
     similar = [repr(k) for k in similar]
     if len(similar) == 1:
         hint = _("Did you mean `{name}`?\n").format(name=similar[0])
         additional = _(
             "`{name}` is a key of `{dict_}` which is similar to `{key}`.\n"
-        ).format(name=similar[0], dict_=dict_name, key=repr(key))
+        ).format(name=similar[0], dict_=dict_name, key=key_repr)
         return {"cause": additional, "suggest": hint}
 
     if similar:
@@ -195,27 +192,30 @@ def key_is_a_string(key: str, dict_name: str, obj: Any) -> CauseInfo:
         names = ", ".join(similar)
         additional = _(
             "`{name}` has some keys similar to `{key}` including:\n`{names}`.\n"
-        ).format(name=dict_name, key=repr(key), names=names)
+        ).format(name=dict_name, key=key_repr, names=names)
         return {"cause": additional, "suggest": hint}
 
     return {}
 
 
-def find_empty_dict_like_obj(
-    frame: FrameType, bad_line: str
-) -> Tuple[Optional[str], Any]:
-    all_objects = info_variables.get_all_objects(bad_line, frame)
+def is_dict_like(obj: Any) -> bool:
+    """Classes like dict have a keys attribute, but cannot themselves
+    be searched for a key.
+    """
+    return not isinstance(obj, type) and hasattr(obj, "keys")
+
+
+def find_empty_dict_like_obj(all_objects: ObjectsInfo) -> Tuple[Optional[str], Any]:
     for name, obj in all_objects["name, obj"]:
-        if hasattr(obj, "keys") and len(obj) == 0:
+        if is_dict_like(obj) and len(obj) == 0:
             return name, obj
     return None, None
 
 
 def find_missing_key_obj(
-    key: Any, frame: FrameType, bad_line: str
+    key: Any, all_objects: ObjectsInfo
 ) -> Tuple[Optional[str], Any]:
-    all_objects = info_variables.get_all_objects(bad_line, frame)
     for name, obj in all_objects["name, obj"]:
-        if hasattr(obj, "keys") and key not in obj:
+        if is_dict_like(obj) and key not in obj:
             return name, obj
     return None, None
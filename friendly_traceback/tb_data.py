@@ -5,17 +5,17 @@ import sys
 import traceback
 import types
 from itertools import dropwhile
-from typing import List, Optional, Tuple, Type
+from typing import Dict, List, Optional, Tuple, Type
 
 from stack_data import BlankLines, Options
 
-from . import debug_helper
+from . import debug_helper, info_variables
 from .frame_info import FrameInfo
 from .ft_gettext import current_lang
 from .path_info import is_excluded_file
 from .source_cache import cache
 from .syntax_errors import source_info
-from .typing_info import _E
+from .typing_info import _E, ObjectsInfo
 
 STR_FAILED = "<exception str() failed>"  # Same as Python
 _ = current_lang.translate
@@ -90,6 +90,10 @@ class TracebackData:
         self.node_range: Optional[Tuple[int, int]] = None
         self.program_stopped_node_range = None
 
+        # Used by get_all_objects() so that different message parsers
+        # do not have to repeat the same search.
+        self._all_objects: Dict[Tuple[types.FrameType, str], ObjectsInfo] = {}
+
         if issubclass(etype, SyntaxError):
             self.statement: Optional[source_info.Statement] = source_info.Statement(
                 self.value, self.bad_line
@@ -111,6 +115,13 @@ class TracebackData:
             self.statement = None
             self.locate_error()
 
+    def get_all_objects(self, line: str, frame: types.FrameType) -> ObjectsInfo:
+        """Cached version of info_variables.get_all_objects()"""
+        key = (frame, line)
+        if key not in self._all_objects:
+            self._all_objects[key] = info_variables.get_all_objects(line, frame)
+        return self._all_objects[key]
+
     def get_records(
         self, tb: types.TracebackType, python_excluded: bool = True
     ) -> List[FrameInfo]:
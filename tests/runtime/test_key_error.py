@@ -166,5 +166,67 @@ def test_Similar_names():
     return result, message
 
 
+def test_Custom_dict_like():
+    class Settings:
+        def __init__(self, **kwargs):
+            self.values = kwargs
+
+        def keys(self):
+            return self.values.keys()
+
+        def __contains__(self, key):
+            return key in self.values
+
+        def __getitem__(self, key):
+            if key not in self.values:
+                raise KeyError(key)
+            return self.values[key]
+
+    settings = Settings(color="red", size=3)
+    try:
+        settings["colour"]
+    except KeyError as e:
+        message = str(e)
+        friendly_traceback.explain_traceback(redirect="capture")
+    result = friendly_traceback.get_output()
+
+    assert "KeyError: 'colour'" in result
+    if friendly_traceback.get_lang() == "en":
+        expected = "Did you mean `'color'`?"
+        ok, diff = expected_in_result(expected, result)
+        assert ok, diff
+    return result, message
+
+
+def test_Popitem_empty_dict_ambiguous_truth():
+    class Table:
+        """Like pandas DataFrame, its truth value is ambiguous."""
+
+        def keys(self):
+            return ["a", "b"]
+
+        def __len__(self):
+            return 2
+
+        def __bool__(self):
+            raise ValueError("The truth value of a Table is ambiguous.")
+
+    table = Table()
+    d = {}
+    try:
+        (table, d)[1].popitem()
+    except KeyError as e:
+        message = str(e)
+        friendly_traceback.explain_traceback(redirect="capture")
+    result = friendly_traceback.get_output()
+
+    assert "popitem(): dictionary is empty" in result
+    if friendly_traceback.get_lang() == "en":
+        expected = "You tried to retrieve an item from `d` which is an empty `dict`."
+        ok, diff = expected_in_result(expected, result)
+        assert ok, diff
+    return result, message
+
+
 if __name__ == "__main__":
     print(test_Generic()[0])
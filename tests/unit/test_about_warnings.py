@@ -0,0 +1,22 @@
+import warnings
+
+from friendly_traceback import about_warnings
+from friendly_traceback.config import session
+
+
+def test_two_warnings_without_frame_on_same_line(tmp_path, monkeypatch):
+    # Both SyntaxWarnings are issued by compile(), without a frame, for the
+    # same line; the source must be found for each of them.
+    line = "x = [(1, 2)(3), [1][None]]"
+    path = tmp_path / "two_syntax_warnings.py"
+    path.write_text(line + "\n")
+
+    monkeypatch.setattr(about_warnings, "_run_with_pytest", False)
+    monkeypatch.setattr(session, "recorded_tracebacks", [])
+    with warnings.catch_warnings():
+        about_warnings.enable_warnings()
+        compile(path.read_text(), str(path), "exec")
+
+    assert len(session.recorded_tracebacks) == 2
+    for warning_data in session.recorded_tracebacks:
+        assert line in warning_data.info["warning source"]
@@ -0,0 +1,26 @@
+from friendly_traceback import message_parser
+
+
+class CustomError(Exception):
+    pass
+
+
+def test_parser_not_called_without_required_substring():
+    parser = message_parser.get_parser(CustomError)
+    calls = []
+
+    @parser._add_matching("needle")
+    def needs_substring(message, _tb_data):
+        calls.append(message)
+        return {"cause": "found needle\n"}
+
+    try:
+        cause = message_parser.get_cause(CustomError, "haystack", None)
+        assert not calls
+        assert "found needle" not in cause.get("cause", "")
+
+        cause = message_parser.get_cause(CustomError, "needle in haystack", None)
+        assert calls == ["needle in haystack"]
+        assert cause == {"cause": "found needle\n"}
+    finally:
+        del message_parser.RUNTIME_MESSAGE_PARSERS[CustomError]